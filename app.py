@@ -4,7 +4,10 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 import io
+import os
+import re
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 
 # =========================================================
 # CONFIG & PAGE SETUP
@@ -97,139 +100,376 @@ h1, h2, h3, h4, h5, h6 {
 # CORE LOGIC
 # =========================================================
 
-def clean_currency(x):
-    """Normalize a currency-like value into a numeric-friendly value.
+# Currency/grouping characters to drop and unicode minus to normalize, in one pass
+_STRIP_TABLE = str.maketrans('−', '-', '$€£,%\xa0')
+_PAREN_RE = re.compile(r'^\((.*)\)$', re.S)
+
+
+def _clean_currency_series(s: pd.Series) -> pd.Series:
+    """Normalize a currency-like column into float64.
 
-    - Handles pandas/Numpy missing values (pd.NA, np.nan)
-    - Decodes bytes
     - Strips common currency symbols and grouping commas
     - Handles negatives in parentheses (e.g. (1,234.56))
-    - Returns a float when parseable, np.nan for empty/missing, or the cleaned string as a fallback
+    - Returns np.nan for empty/missing or unparseable values
+
+    Runs through pandas' vectorized string methods. Manifests repeat the
+    same prices and quantities heavily, so only the distinct values are
+    cleaned and the result is broadcast back through the factorized codes.
     """
-    # Preserve pandas/Numpy NA
-    try:
-        if pd.isna(x):
-            return np.nan
-    except Exception:
-        pass
+    codes, uniques = pd.factorize(s)
+    vals = _clean_currency_uniques(pd.Series(uniques, dtype=object)).to_numpy(dtype='float64', na_value=np.nan)
+    # Missing values are coded -1, which picks up the trailing NaN
+    vals = np.append(vals, np.nan)
+    return pd.Series(vals[codes], index=s.index)
 
-    # Decode bytes if necessary
-    if isinstance(x, (bytes, bytearray)):
-        try:
-            x = x.decode('utf-8')
-        except Exception:
-            x = x.decode('latin1', errors='ignore')
 
-    # If it's a string, normalize
-    if isinstance(x, str):
-        s = x.strip()
-        if s == '':
-            return np.nan
+def _clean_currency_uniques(s: pd.Series) -> pd.Series:
+    """Vectorized cleaning pass behind `_clean_currency_series`."""
+    s = s.astype('string').str.strip()
 
-        negative = False
-        if s.startswith('(') and s.endswith(')'):
-            negative = True
-            s = s[1:-1].strip()
+    # Negatives in parentheses, e.g. (1,234.56)
+    neg = (s.str.startswith('(') & s.str.endswith(')')).fillna(False)
+    s = s.str.replace(_PAREN_RE, r'\1', regex=True)
 
-        # Remove common currency/grouping characters
-        for ch in ['$', '€', '£', ',', '%', '\xa0']:
-            s = s.replace(ch, '')
+    # Remove common currency/grouping characters and normalize unicode minus
+    s = s.str.translate(_STRIP_TABLE).str.strip()
 
-        # Normalize unicode minus
-        s = s.replace('−', '-')
-        s = s.strip()
+    out = pd.to_numeric(s, errors='coerce').astype('float64')
+    return out.where(~neg, -out)
 
-        if s in ['', '--', '-']:
-            return np.nan
 
-        # Try to parse as float
-        try:
-            val = float(s)
-            return -val if negative else val
-        except Exception:
-            # Leave as cleaned string; pd.to_numeric(..., errors='coerce') will handle it later
-            return s
+def _clean_currency_frame(df: pd.DataFrame) -> np.ndarray:
+    """Clean every column of `df` into one (N, k) float64 array.
 
-    # For numeric types, return unchanged
-    return x
+    Already-numeric columns are cast directly. The text columns are stacked
+    end to end and cleaned by a single `_clean_currency_series` call, so the
+    string kernels run once over their combined distinct values.
+    """
+    out = np.empty(df.shape, dtype='float64')
+    text = []
+    for i in range(df.shape[1]):
+        col = df.iloc[:, i]
+        if pd.api.types.is_numeric_dtype(col):
+            out[:, i] = col.to_numpy(dtype='float64', na_value=np.nan)
+        else:
+            text.append(i)
 
+    if text:
+        raw = np.concatenate([df.iloc[:, i].to_numpy(dtype=object) for i in text])
+        cleaned = _clean_currency_series(pd.Series(raw, dtype=object)).to_numpy()
+        out[:, text] = cleaned.reshape(len(text), len(df)).T
+    return out
 
-def load_data(uploaded_files):
-    all_data = []
-    
-    for file in uploaded_files:
+
+def _read_table(file, file_name, **kwargs):
+    """Read a CSV/Excel upload from the start, falling back to latin1 for CSVs."""
+    file.seek(0)
+    if file_name.endswith('.csv'):
+        # C parser without NA-string scanning; missing/blank cells are handled by the cleanup
+        kwargs = dict(engine='c', na_filter=False, **kwargs)
         try:
-            if file.name.endswith('.csv'):
-                try:
-                    df = pd.read_csv(file, encoding='utf-8-sig')
-                except:
-                    file.seek(0)
-                    df = pd.read_csv(file, encoding='latin1')
-            else:
-                df = pd.read_excel(file)
-            
-            # Normalize Headers
+            return pd.read_csv(file, encoding='utf-8-sig', **kwargs)
+        except:
+            file.seek(0)
+            return pd.read_csv(file, encoding='latin1', **kwargs)
+    # calamine (Rust) reads xlsx/xls far faster than openpyxl's cell graph
+    return pd.read_excel(file, engine='calamine', **kwargs)
+
+
+def _process_one(file_bytes, file_name):
+    """Parse and summarize a single uploaded manifest."""
+    file = io.BytesIO(file_bytes)
+    try:
+        # Peek the header only; the body is read once we know which columns we need
+        header = _read_table(file, file_name, nrows=0).columns
+        
+        # Normalize Headers (keep the raw names for usecols; first match wins on collisions)
+        raw_names = {}
+        for c in header:
+            raw_names.setdefault(c.strip(), c)
+        columns = list(raw_names)
+        
+        # Fuzzy Column Matching Logic (lowercase each header once; first match wins on collisions)
+        lower_map = {}
+        for c in columns:
+            lower_map.setdefault(c.lower(), c)
+        lower_names = list(lower_map)
+        
+        col_qty = next((lower_map[ln] for ln in lower_names if 'qty' in ln), None)
+        col_retail = next((lower_map[ln] for ln in lower_names if 'unit' in ln and 'retail' in ln), None) # Prioritize "Unit Retail"
+        if not col_retail:
+             col_retail = next((lower_map[ln] for ln in lower_names if 'retail' in ln and 'ext' not in ln), None)
+        
+        col_ext_cost = next((lower_map[ln] for ln in lower_names if 'ext' in ln and 'retail' in ln), None) # Default standard
+        # Fallback if standard format isn't found, try to find a 'Cost' column
+        if not col_ext_cost:
+             col_ext_cost = next((lower_map[ln] for ln in lower_names if 'cost' in ln and 'ext' in ln), None)
+
+        # Match Description Column for better variety check (optional)
+        col_desc = next((lower_map[ln] for ln in lower_names if 'desc' in ln or 'item' in ln or 'product' in ln), None)
+
+        status = "OK"
+        details = ""
+        items, total_cost, total_retail = 0, 0, 0
+        
+        if not all([col_qty, col_retail, col_ext_cost]):
+            status = "ERROR"
+            details = f"Missing Columns. Found: {columns}"
+        else:
+            # Only parse the three matched columns
+            usecols = list(dict.fromkeys(raw_names[c] for c in (col_qty, col_retail, col_ext_cost)))
+            df = _read_table(file, file_name, usecols=usecols)
             df.columns = [c.strip() for c in df.columns]
             
-            # Fuzzy Column Matching Logic
-            cols = df.columns.str.lower()
-            
-            col_qty = next((c for c in df.columns if 'qty' in c.lower()), None)
-            col_retail = next((c for c in df.columns if 'unit retail' in c.lower()), None) # Prioritize "Unit Retail"
-            if not col_retail:
-                 col_retail = next((c for c in df.columns if 'retail' in c.lower() and 'ext' not in c.lower()), None)
+            # Clean Data (columns: Qty, Unit Retail, Ext Retail)
+            clean = _clean_currency_frame(df[[col_qty, col_retail, col_ext_cost]])
+            clean[np.isnan(clean)] = 0
+            qty, retail, cost = clean[:, 0], clean[:, 1], clean[:, 2]
             
-            col_ext_cost = next((c for c in df.columns if 'ext' in c.lower() and 'retail' in c.lower()), None) # Default standard
-            # Fallback if standard format isn't found, try to find a 'Cost' column
-            if not col_ext_cost:
-                 col_ext_cost = next((c for c in df.columns if 'cost' in c.lower() and 'ext' in c.lower()), None)
+            # Basic Calcs (reduce straight to the package totals, no per-row
+            # Total_Retail_Value column)
+            items = qty.sum()
+            total_cost = cost.sum()
+            total_retail = np.dot(qty, retail)
+        
+        # Calculate Variety (Unique Lines with Qty > 0)
+        if status == "OK":
+            variety_count = int((qty > 0).sum())
+        else:
+            variety_count = 0
+
+        # Package Summary
+        summary = {
+            'Filename': file_name,
+            'Status': status,
+            'Details': details,
+            'Items': items,
+            'Variety': variety_count,
+            'Total_Cost': total_cost,
+            'Total_Retail': total_retail
+        }
+        return summary
+
+    except Exception as e:
+        return {
+            'Filename': file_name,
+            'Status': "CRITICAL ERROR",
+            'Details': str(e),
+            'Items': 0, 'Variety': 0, 'Total_Cost': 0, 'Total_Retail': 0
+        }
+
+
+_SUMMARY_DTYPES = {
+    'Filename': 'string',
+    'Status': 'string',
+    'Details': 'string',
+    'Items': 'float64',
+    'Variety': 'int64',
+    'Total_Cost': 'float64',
+    'Total_Retail': 'float64'
+}
 
-            # Match Description Column for better variety check (optional)
-            col_desc = next((c for c in df.columns if 'desc' in c.lower() or 'item' in c.lower() or 'product' in c.lower()), None)
 
-            status = "OK"
-            details = ""
-            
-            if not all([col_qty, col_retail, col_ext_cost]):
-                status = "ERROR"
-                details = f"Missing Columns. Found: {list(df.columns)}"
-            else:
-                # Clean Data
-                df['Qty_Clean'] = pd.to_numeric(df[col_qty].apply(clean_currency), errors='coerce').fillna(0)
-                df['Retail_Clean'] = pd.to_numeric(df[col_retail].apply(clean_currency), errors='coerce').fillna(0)
-                df['Cost_Clean'] = pd.to_numeric(df[col_ext_cost].apply(clean_currency), errors='coerce').fillna(0)
-                
-                # Basic Calcs
-                df['Total_Retail_Value'] = df['Qty_Clean'] * df['Retail_Clean']
-            
-            # Calculate Variety (Unique Lines with Qty > 0)
-            if status == "OK":
-                variety_count = len(df[df['Qty_Clean'] > 0])
-            else:
-                variety_count = 0
-
-            # Package Summary
-            summary = {
-                'Filename': file.name,
-                'Status': status,
-                'Details': details,
-                'Items': df['Qty_Clean'].sum() if status == "OK" else 0,
-                'Variety': variety_count,
-                'Total_Cost': df['Cost_Clean'].sum() if status == "OK" else 0,
-                'Total_Retail': df['Total_Retail_Value'].sum() if status == "OK" else 0,
-                'Raw_Data': df if status == "OK" else pd.DataFrame()
-            }
-            all_data.append(summary)
-
-        except Exception as e:
-            all_data.append({
-                'Filename': file.name,
-                'Status': "CRITICAL ERROR",
-                'Details': str(e),
-                'Items': 0, 'Variety': 0, 'Total_Cost': 0, 'Total_Retail': 0, 'Raw_Data': pd.DataFrame()
-            })
-            
-    return pd.DataFrame(all_data)
+def _process_all(files):
+    # Files are independent, so parse them concurrently; the pandas C parser
+    # releases the GIL while tokenizing
+    with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as ex:
+        return list(ex.map(_process_one, [b for _, b in files], [n for n, _ in files]))
+
+
+@st.cache_data(show_spinner="Parsing manifests...", max_entries=16)
+def load_data_cached(files: tuple[tuple[str, bytes], ...]) -> pd.DataFrame:
+    """Per-file summary table, cached on the uploaded file names and contents."""
+    return pd.DataFrame.from_records(_process_all(files), columns=list(_SUMMARY_DTYPES)).astype(_SUMMARY_DTYPES)
+
+
+def load_data(uploaded_files):
+    # Slider changes rerun the script but not the parsing: the cache key is the file bytes
+    return load_data_cached(tuple((f.name, f.getvalue()) for f in uploaded_files))
+
+# =========================================================
+# CHARTS
+# =========================================================
+# Cached on the scenario scalars, so reruns with unchanged inputs reuse the figure
+
+
+@st.cache_data(max_entries=32)
+def _build_waterfall(revenue, cost, overhead, profit):
+    """Revenue -> cost -> overhead -> net profit waterfall for the whole scenario."""
+    fig = go.Figure(go.Waterfall(
+        name = "20", orientation = "v",
+        measure = ["relative", "relative", "relative", "total"],
+        x = ["Sales Revenue", "Product Cost", "Overhead (Freight/Misc)", "Net Profit"],
+        textposition = "outside",
+        text = [f"${revenue/1000:.1f}k", f"-${cost/1000:.1f}k", f"-${overhead/1000:.1f}k", f"${profit/1000:.1f}k"],
+        y = [revenue, -cost, -overhead, profit],
+        connector = {"line":{"color":"rgb(63, 63, 63)"}},
+    ))
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#e6e6e6'),
+        height=350,
+        margin=dict(l=20, r=20, t=30, b=20)
+    )
+    return fig
+
+
+@st.cache_data(max_entries=32)
+def _build_margin_bar(filenames, costs, profits):
+    """Grouped cost vs. profit bars per file."""
+    plot_df = pd.DataFrame({'Filename': filenames, 'Total_Cost': costs, 'File_Profit': profits})
+    fig = px.bar(
+        plot_df, 
+        x='Filename', 
+        y=['Total_Cost', 'File_Profit'], 
+        title="",
+        barmode='group',
+        color_discrete_sequence=['#ff4b4b', '#00fa9a']
+    )
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#e6e6e6'),
+        legend=dict(orientation="h", y=1.1, title=None),
+        xaxis_title=None,
+        yaxis_title="$ USD",
+        height=350,
+        margin=dict(l=20, r=20, t=30, b=20)
+    )
+    return fig
+
+# =========================================================
+# SCENARIO VIEW
+# =========================================================
+
+
+def _card_html(label, value, sub, value_style="", card_style=""):
+    """HTML for one dashboard metric card."""
+    return (
+        f'<div class="metric-card" style="{card_style}">'
+        f'<div class="metric-label">{label}</div>'
+        f'<div class="metric-value" style="{value_style}">{value}</div>'
+        f'<div style="font-size:0.8rem; color:#888;">{sub}</div>'
+        '</div>'
+    )
+
+
+@st.fragment
+def _scenario_view(valid_packages):
+    """Scenario controls, KPIs, charts and comparison table for the valid packages.
+
+    Runs as a fragment: moving a slider reruns only this block, not the page
+    scaffold or the upload handling.
+    """
+    # SCENARIO CONTROLS (widgets must live inside the fragment)
+    st.subheader("⚙️ Simulation Settings")
+    s1, s2, s3 = st.columns(3)
+    with s1:
+        discount_scenario = st.slider("Liquidation Sale Price (% of Retail)", 10, 100, 35, help="At what % of the original retail price will you sell the items?")
+    with s2:
+        freight_cost = st.number_input("Est. Freight Cost per Lot ($)", min_value=0.0, value=0.0, step=50.0)
+    with s3:
+        misc_cost = st.number_input("Misc/Labor Cost per Lot ($)", min_value=0.0, value=0.0, step=50.0)
+    
+    st.info(f"**Scenario Mode**: Selling items at **{discount_scenario}%** of Retail Value.")
+    
+    # AGGREGATE METRICS FOR SELECTED SCENARIO (GLOBAL)
+    # Apply global costs multiplied by number of packages
+    num_packages = len(valid_packages)
+    total_freight = freight_cost * num_packages
+    total_misc = misc_cost * num_packages
+    
+    total_purchase_cost = valid_packages['Total_Cost'].sum()
+    total_retail_value = valid_packages['Total_Retail'].sum()
+    
+    # SCENARIO CALCULATIONS
+    projected_revenue = total_retail_value * (discount_scenario / 100.0)
+    total_expenses = total_purchase_cost + total_freight + total_misc
+    projected_profit = projected_revenue - total_expenses
+    roi = (projected_profit / total_expenses) * 100 if total_expenses > 0 else 0
+    
+    # ---------------------------------------------------------
+    # 1. EXECUTIVE DASHBOARD
+    # ---------------------------------------------------------
+    profit_color = "#00fa9a" if projected_profit > 0 else "#ff4b4b"
+    roi_color = "#00fa9a" if roi > 20 else ("#ffbf00" if roi > 0 else "#ff4b4b")
+    cards = [
+        ("Total Investment", f"${total_expenses:,.2f}", "Product + Freight + Misc", "", ""),
+        ("Projected Revenue", f"${projected_revenue:,.2f}", f"@ {discount_scenario}% of Retail", "color:#00d4ff;", ""),
+        ("Net Profit", f"${projected_profit:,.2f}", "Cash in Pocket", f"background:none; color:{profit_color};", f"border-color:{profit_color};"),
+        ("ROI", f"{roi:,.1f}%", "Return on Investment", f"background:none; color:{roi_color};", ""),
+    ]
+    # One markdown element for all four cards instead of four columns + four messages
+    st.markdown(
+        '<div style="display:grid; grid-template-columns: repeat(4, 1fr); gap:15px;">'
+        + "".join(_card_html(*card) for card in cards)
+        + '</div>',
+        unsafe_allow_html=True
+    )
+    
+    st.markdown("---")
+    
+    # ---------------------------------------------------------
+    # 2. VISUAL ANALYTICS
+    # ---------------------------------------------------------
+    c1, c2 = st.columns([2, 1])
+    
+    with c1:
+        st.subheader("💰 Financial Waterfall")
+        fig_waterfall = _build_waterfall(float(projected_revenue), float(total_purchase_cost), float(total_freight + total_misc), float(projected_profit))
+        st.plotly_chart(fig_waterfall, use_container_width=True)
+        
+    with c2:
+        st.subheader("📦 Margin Analysis per File")
+        # Calculate per-file metrics for the chart
+        # Note: Freight/Misc is subtracted equally per file for the chart
+        file_profit = valid_packages['Total_Retail'].to_numpy() * (discount_scenario / 100.0) - valid_packages['Total_Cost'].to_numpy() - (freight_cost + misc_cost)
+        fig_bar = _build_margin_bar(
+            tuple(valid_packages['Filename'].tolist()),
+            tuple(valid_packages['Total_Cost'].tolist()),
+            tuple(file_profit.tolist())
+        )
+        st.plotly_chart(fig_bar, use_container_width=True)
+
+    # ---------------------------------------------------------
+    # 3. DETAILED BREAKDOWN
+    # ---------------------------------------------------------
+    st.subheader("📋 Package Comparison")
+    
+    # Format for display
+    display_df = valid_packages[['Filename', 'Items', 'Total_Cost', 'Total_Retail']].copy()
+    
+    # Add Variety if available
+    if 'Variety' in valid_packages.columns:
+        display_df['Variety (SKUs)'] = valid_packages['Variety']
+    
+    # Scenario columns in one fused eval (numexpr when available)
+    display_df = display_df.eval(
+        "Projected_Revenue = Total_Retail * @rate\n"
+        "Net_Profit = Projected_Revenue - Total_Cost - @overhead\n"
+        "ROI = Net_Profit / (Total_Cost + @overhead) * 100",
+        local_dict={'rate': discount_scenario / 100.0, 'overhead': freight_cost + misc_cost}
+    ).rename(columns={'Projected_Revenue': 'Projected Revenue', 'Net_Profit': 'Net Profit'})
+    
+    # Reorder columns
+    cols = ['Filename', 'Items', 'Total_Cost', 'Total_Retail', 'Projected Revenue', 'Net Profit', 'ROI']
+    if 'Variety (SKUs)' in display_df.columns:
+        cols.insert(2, 'Variety (SKUs)')
+    
+    display_df = display_df[cols]
+
+    # Formatting
+    st.dataframe(
+        display_df.style.format({
+            'Total_Cost': "${:,.2f}",
+            'Total_Retail': "${:,.2f}",
+            'Projected Revenue': "${:,.2f}",
+            'Net Profit': "${:,.2f}",
+            'ROI': "{:,.1f}%"
+        }).background_gradient(subset=['ROI'], cmap='RdYlGn', vmin=-20, vmax=100),
+        use_container_width=True
+    )
 
 # =========================================================
 # UI LAYOUT
@@ -252,21 +492,6 @@ tab_analysis, tab_automation = st.tabs(["📊 Analysis Dashboard", "🤖 Auto-So
 # TAB 1: ANALYSIS DASHBOARD
 # ---------------------------------------------------------
 with tab_analysis:
-    # SIDEBAR CONTROLS
-    with st.sidebar:
-        st.header("⚙️ Simulation Settings")
-        st.markdown("Adjust these sliders to model real-world scenarios.")
-        
-        st.subheader("Revenue Scenarios")
-        discount_scenario = st.slider("Liquidation Sale Price (% of Retail)", 10, 100, 35, help="At what % of the original retail price will you sell the items?")
-        
-        st.subheader("Costs")
-        freight_cost = st.number_input("Est. Freight Cost per Lot ($)", min_value=0.0, value=0.0, step=50.0)
-        misc_cost = st.number_input("Misc/Labor Cost per Lot ($)", min_value=0.0, value=0.0, step=50.0)
-        
-        st.markdown("---")
-        st.info(f"**Scenario Mode**: Selling items at **{discount_scenario}%** of Retail Value.")
-
     # FILE UPLOADER
     uploaded_files = st.file_uploader("Drop Manifest Files Here (CSV/Excel)", accept_multiple_files=True, type=['csv', 'xlsx', 'xls'])
 
@@ -275,157 +500,10 @@ with tab_analysis:
         df_summary = load_data(uploaded_files)
         
         # Filter valid data
-        valid_packages = df_summary[df_summary['Status'] == "OK"].copy()
+        valid_packages = df_summary[df_summary['Status'] == "OK"]
         
         if not valid_packages.empty:
-            # AGGREGATE METRICS FOR SELECTED SCENARIO (GLOBAL)
-            # Apply global costs multiplied by number of packages
-            num_packages = len(valid_packages)
-            total_freight = freight_cost * num_packages
-            total_misc = misc_cost * num_packages
-            
-            total_purchase_cost = valid_packages['Total_Cost'].sum()
-            total_retail_value = valid_packages['Total_Retail'].sum()
-            
-            # SCENARIO CALCULATIONS
-            projected_revenue = total_retail_value * (discount_scenario / 100.0)
-            total_expenses = total_purchase_cost + total_freight + total_misc
-            projected_profit = projected_revenue - total_expenses
-            roi = (projected_profit / total_expenses) * 100 if total_expenses > 0 else 0
-            
-            # ---------------------------------------------------------
-            # 1. EXECUTIVE DASHBOARD
-            # ---------------------------------------------------------
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                st.markdown(f"""
-                <div class="metric-card">
-                    <div class="metric-label">Total Investment</div>
-                    <div class="metric-value">${total_expenses:,.2f}</div>
-                    <div style="font-size:0.8rem; color:#888;">Product + Freight + Misc</div>
-                </div>
-                """, unsafe_allow_html=True)
-                
-            with col2:
-                st.markdown(f"""
-                <div class="metric-card">
-                    <div class="metric-label">Projected Revenue</div>
-                    <div class="metric-value" style="color:#00d4ff;">${projected_revenue:,.2f}</div>
-                    <div style="font-size:0.8rem; color:#888;">@ {discount_scenario}% of Retail</div>
-                </div>
-                """, unsafe_allow_html=True)
-
-            with col3:
-                color = "#00fa9a" if projected_profit > 0 else "#ff4b4b"
-                st.markdown(f"""
-                <div class="metric-card" style="border-color:{color};">
-                    <div class="metric-label">Net Profit</div>
-                    <div class="metric-value" style="background:none; color:{color};">${projected_profit:,.2f}</div>
-                    <div style="font-size:0.8rem; color:#888;">Cash in Pocket</div>
-                </div>
-                """, unsafe_allow_html=True)
-                
-            with col4:
-                color = "#00fa9a" if roi > 20 else ("#ffbf00" if roi > 0 else "#ff4b4b")
-                st.markdown(f"""
-                <div class="metric-card">
-                    <div class="metric-label">ROI</div>
-                    <div class="metric-value" style="background:none; color:{color};">{roi:,.1f}%</div>
-                    <div style="font-size:0.8rem; color:#888;">Return on Investment</div>
-                </div>
-                """, unsafe_allow_html=True)
-                
-            st.markdown("---")
-            
-            # ---------------------------------------------------------
-            # 2. VISUAL ANALYTICS
-            # ---------------------------------------------------------
-            c1, c2 = st.columns([2, 1])
-            
-            with c1:
-                st.subheader("💰 Financial Waterfall")
-                # Waterfall Chart Logic
-                fig_waterfall = go.Figure(go.Waterfall(
-                    name = "20", orientation = "v",
-                    measure = ["relative", "relative", "relative", "total"],
-                    x = ["Sales Revenue", "Product Cost", "Overhead (Freight/Misc)", "Net Profit"],
-                    textposition = "outside",
-                    text = [f"${projected_revenue/1000:.1f}k", f"-${total_purchase_cost/1000:.1f}k", f"-${(total_freight+total_misc)/1000:.1f}k", f"${projected_profit/1000:.1f}k"],
-                    y = [projected_revenue, -total_purchase_cost, -(total_freight+total_misc), projected_profit],
-                    connector = {"line":{"color":"rgb(63, 63, 63)"}},
-                ))
-                fig_waterfall.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font=dict(color='#e6e6e6'),
-                    height=350,
-                    margin=dict(l=20, r=20, t=30, b=20)
-                )
-                st.plotly_chart(fig_waterfall, use_container_width=True)
-                
-            with c2:
-                st.subheader("📦 Margin Analysis per File")
-                # Calculate per-file metrics for the chart
-                # Note: Freight/Misc is subtracted equally per file for the chart
-                valid_packages['File_Revenue'] = valid_packages['Total_Retail'] * (discount_scenario / 100.0)
-                valid_packages['File_Overhead'] = freight_cost + misc_cost
-                valid_packages['File_Profit'] = valid_packages['File_Revenue'] - valid_packages['Total_Cost'] - valid_packages['File_Overhead']
-                
-                fig_bar = px.bar(
-                    valid_packages, 
-                    x='Filename', 
-                    y=['Total_Cost', 'File_Profit'], 
-                    title="",
-                    barmode='group',
-                    color_discrete_sequence=['#ff4b4b', '#00fa9a']
-                )
-                fig_bar.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font=dict(color='#e6e6e6'),
-                    legend=dict(orientation="h", y=1.1, title=None),
-                    xaxis_title=None,
-                    yaxis_title="$ USD",
-                    height=350,
-                    margin=dict(l=20, r=20, t=30, b=20)
-                )
-                st.plotly_chart(fig_bar, use_container_width=True)
-
-            # ---------------------------------------------------------
-            # 3. DETAILED BREAKDOWN
-            # ---------------------------------------------------------
-            st.subheader("📋 Package Comparison")
-            
-            # Format for display
-            display_df = valid_packages[['Filename', 'Items', 'Total_Cost', 'Total_Retail']].copy()
-            
-            # Add Variety if available
-            if 'Variety' in valid_packages.columns:
-                display_df['Variety (SKUs)'] = valid_packages['Variety']
-            
-            display_df['Projected Revenue'] = display_df['Total_Retail'] * (discount_scenario / 100.0)
-            display_df['Net Profit'] = display_df['Projected Revenue'] - display_df['Total_Cost'] - (freight_cost + misc_cost)
-            display_df['ROI'] = (display_df['Net Profit'] / (display_df['Total_Cost'] + freight_cost + misc_cost)) * 100
-            
-            # Reorder columns
-            cols = ['Filename', 'Items', 'Total_Cost', 'Total_Retail', 'Projected Revenue', 'Net Profit', 'ROI']
-            if 'Variety (SKUs)' in display_df.columns:
-                cols.insert(2, 'Variety (SKUs)')
-            
-            display_df = display_df[cols]
-
-            # Formatting
-            st.dataframe(
-                display_df.style.format({
-                    'Total_Cost': "${:,.2f}",
-                    'Total_Retail': "${:,.2f}",
-                    'Projected Revenue': "${:,.2f}",
-                    'Net Profit': "${:,.2f}",
-                    'ROI': "{:,.1f}%"
-                }).background_gradient(subset=['ROI'], cmap='RdYlGn', vmin=-20, vmax=100),
-                use_container_width=True
-            )
+            _scenario_view(valid_packages)
 
         else:
             st.warning("Could not process any valid files. Please check column headers.")